@@ -43,13 +43,13 @@ Libraries Used:
     - ydata-profiling
     - numpy
     - datetime
-    - dateutil
-    - sqlite3
     - matplotlib.pyplot
     - seaborn
+    - importlib
+    - pyarrow or fastparquet (optional, Parquet cache of the cleaned datasets)
 
 Notes:
-    - This script uses SQLite for in-memory SQL queries.
+    - The SQL questions are answered with pandas filters and groupby aggregations.
     - Visualizations are generated to support findings and trends.
 """
 
@@ -61,8 +61,7 @@ import pandas as pd
 from ydata_profiling import ProfileReport
 import numpy as np
 from datetime import datetime
-from dateutil.relativedelta import relativedelta
-import sqlite3
+from importlib.util import find_spec
 import matplotlib.pyplot as plt
 import seaborn as sns
 
@@ -72,19 +71,77 @@ data_folder = os.path.join(cwd, 'data')
 profiling_folder = os.path.join(cwd, 'profiling')
 visuals_folder = os.path.join(cwd, 'visuals')
 
-# Import datasets
-user = pd.read_csv(os.path.join(data_folder, "USER_TAKEHOME.csv"))
-transaction = pd.read_csv(os.path.join(data_folder, "TRANSACTION_TAKEHOME.csv"))
-products = pd.read_csv(os.path.join(data_folder, "PRODUCTS_TAKEHOME.csv"))
+# Column types for each dataset, declared up front to skip type inference and later re-casting
+# BARCODE is read as a nullable integer so codes that differ only by leading zeros (UPC vs EAN) still match
+# and the products merge joins on integer keys
+user_dtypes = {
+    'ID': 'string', 'CREATED_DATE': 'string', 'BIRTH_DATE': 'string',
+    'STATE': 'string', 'LANGUAGE': 'string', 'GENDER': 'string'
+}
+transaction_dtypes = {
+    'RECEIPT_ID': 'string', 'PURCHASE_DATE': 'string', 'SCAN_DATE': 'string', 'STORE_NAME': 'string',
+    'USER_ID': 'string', 'BARCODE': 'Int64', 'FINAL_QUANTITY': 'string', 'FINAL_SALE': 'float64'
+}
+products_dtypes = {
+    'CATEGORY_1': 'string', 'CATEGORY_2': 'string', 'CATEGORY_3': 'string', 'CATEGORY_4': 'string',
+    'MANUFACTURER': 'string', 'BRAND': 'string', 'BARCODE': 'Int64'
+}
+
+# Raw dataset files
+user_file = os.path.join(data_folder, "USER_TAKEHOME.csv")
+transaction_file = os.path.join(data_folder, "TRANSACTION_TAKEHOME.csv")
+products_file = os.path.join(data_folder, "PRODUCTS_TAKEHOME.csv")
+
+# Cleaned datasets are cached as Parquet so re-runs can skip parsing and cleaning the CSV files
+cache_folder = os.path.join(data_folder, 'cache')
+cache_files = {
+    name: os.path.join(cache_folder, f"{name}.parquet")
+    for name in ['user', 'transaction', 'products', 'duplicate_products']
+}
+
+# Set parameter to run when profiling reports need to be generated
+profiling_run = False
+
+# Set parameter to reuse the cleaned datasets cached by an earlier run
+cache_run = True
+
+# Parquet needs pyarrow or fastparquet, which are optional, so the cache is skipped when neither is installed
+parquet_available = find_spec('pyarrow') is not None or find_spec('fastparquet') is not None
+if cache_run == True and parquet_available == False:
+    print('Parquet cache skipped: install pyarrow or fastparquet to cache the cleaned datasets.')
+
+# The cache depends on the CSV files and on this script, so editing the cleaning code invalidates it
+# (when the script path is unknown, e.g. code pasted into a console, the cache is not used)
+script_file = globals().get('__file__')
+source_files = [user_file, transaction_file, products_file, script_file]
+
+# The cache is only used when every file is newer than its sources and was written today, since AGE and
+# ACCOUNT_AGE_MONTHS depend on the current date. Profiling needs the raw datasets, so it always re-cleans.
+use_cache = cache_run == True and parquet_available == True and profiling_run == False and script_file is not None and all(
+    os.path.exists(path)
+    and os.path.getmtime(path) > max(os.path.getmtime(file) for file in source_files)
+    and datetime.fromtimestamp(os.path.getmtime(path)).date() == datetime.now().date()
+    for path in cache_files.values()
+)
+
+if use_cache == True:
+    # Import cleaned datasets
+    user = pd.read_parquet(cache_files['user'])
+    transaction = pd.read_parquet(cache_files['transaction'])
+    products = pd.read_parquet(cache_files['products'])
+    duplicate_products_df = pd.read_parquet(cache_files['duplicate_products'])
+else:
+    # Import datasets
+    user = pd.read_csv(user_file, dtype=user_dtypes, low_memory=False)
+    # FINAL_SALE uses a blank space for missing values
+    transaction = pd.read_csv(transaction_file, dtype=transaction_dtypes, na_values={'FINAL_SALE': [' ']}, low_memory=False)
+    products = pd.read_csv(products_file, dtype=products_dtypes, low_memory=False)
 
 
 #%% CLEAN & PROFILE DATA
 
 #### Profiling
 
-# Set parameter to run when profiling reports need to be generated
-profiling_run = False
-
 # Profile individual datasets
 if profiling_run == True:
     ProfileReport(user).to_file(os.path.join(profiling_folder, "user_profile.html"))
@@ -93,185 +150,184 @@ if profiling_run == True:
 
 #### Data clean & prep
 
-#### -- User data
+# Clean the raw datasets unless the cached cleaned datasets were loaded
+if use_cache == False:
+    # Current date for the age calculations, captured once so every user is measured against the same day
+    TODAY = pd.Timestamp(datetime.now().date())
 
-# Drop duplicate rows
-user = user.drop_duplicates()
+    #### -- User data
 
-# Remove birthdays prior to 1925 (100 years)
-user = user.loc[(user['BIRTH_DATE'] >= '1925-01-01')]
+    # Ensure date columns are datetime
+    # Timestamps are stored as UTC with a literal 'Z' suffix, so an explicit format skips per-row inference and drops the timezone
+    date_format = '%Y-%m-%d %H:%M:%S.%f Z'
+    user['BIRTH_DATE'] = pd.to_datetime(user['BIRTH_DATE'], format=date_format, errors='coerce', cache=True)
+    user['CREATED_DATE'] = pd.to_datetime(user['CREATED_DATE'], format=date_format, errors='coerce', cache=True)
 
-# Group extraneous values and convert to missing
-texts_to_replace = ['prefer_not_to_say', 'Prefer not to say', 'unknown', 'not_listed', 'not_specified', "My gender isn't listed"]
-user['GENDER'] = user['GENDER'].replace(texts_to_replace, np.nan)
+    # Whole months from a date column to the current date (vectorized)
+    # Anniversaries count from the start of the day, so this matches relativedelta only at day granularity
+    def calculate_months_elapsed(dates):
+        # Months between the calendar months
+        months = (TODAY.year - dates.dt.year) * 12 + (TODAY.month - dates.dt.month)
 
-# Group different formats together
-texts_to_replace = ['non_binary', 'Non-Binary']
-user['GENDER'] = user['GENDER'].replace(texts_to_replace, "non_binary")
+        # Day of the monthly anniversary, clamped to the end of the current month (e.g. Feb 29 -> Feb 28)
+        anniversary_day = dates.dt.day.clip(upper=TODAY.days_in_month)
 
-# Add age column
-# Ensure birthdate column is datetime
-user['BIRTH_DATE'] = pd.to_datetime(user['BIRTH_DATE'], errors='coerce')
+        # Subtract a month where this month's anniversary has not been reached yet
+        return months - (anniversary_day > TODAY.day).astype('int8')
 
-# Birthday function from current date, removing timezone
-def calculate_age_precise(birthdate):
-    # Drop timezone
-    today = datetime.now().replace(tzinfo=None)
-    birthdate = birthdate.replace(tzinfo=None)
+    # Add age and account age (in months) columns
+    user['AGE'] = (calculate_months_elapsed(user['BIRTH_DATE']) // 12).astype('Int16')
+    user['ACCOUNT_AGE_MONTHS'] = calculate_months_elapsed(user['CREATED_DATE']).astype('Int32')
 
-    return relativedelta(today, birthdate).years
+    # Drop duplicate rows, birthdays prior to 1925 (100 years) and users under age 13 in a single selection
+    user_mask = (
+        ~user.duplicated()
+        & (user['BIRTH_DATE'] >= pd.Timestamp('1925-01-01'))
+        & (user['AGE'] >= 13)
+    )
+    user = user.loc[user_mask].copy()
 
-user['AGE'] = user['BIRTH_DATE'].apply(calculate_age_precise)
+    # Group extraneous values and convert to missing
+    missing_genders = {'prefer_not_to_say', 'Prefer not to say', 'unknown', 'not_listed', 'not_specified', "My gender isn't listed"}
+    user.loc[user['GENDER'].isin(missing_genders), 'GENDER'] = np.nan
 
-# Drop users under age 13
-user = user.loc[(user['AGE'] >= 13)]
+    # Group different formats together
+    non_binary_genders = {'non_binary', 'Non-Binary'}
+    user['GENDER'] = user['GENDER'].where(~user['GENDER'].isin(non_binary_genders), 'non_binary')
 
-# Add account age column (in months)
-# Ensure created date column is datetime
-user['CREATED_DATE'] = pd.to_datetime(user['CREATED_DATE'], errors='coerce')
 
-# Account age fucntion from current date (in months), removing timezone
-def calculate_account_age_months(creation_date):
-    # Drop timezone
-    today = datetime.now().replace(tzinfo=None)
-    creation_date = creation_date.replace(tzinfo=None)
+    #### -- Transaction data
 
-    rd = relativedelta(today, creation_date)
-    return rd.years * 12 + rd.months
+    # Drop duplicate rows
+    transaction = transaction.drop_duplicates()
 
-# Assuming 'user' is your DataFrame and 'CREATION_DATE' is the column
-user['ACCOUNT_AGE_MONTHS'] = user['CREATED_DATE'].apply(calculate_account_age_months)
+    # Convert FINAL_QUANTITY to numeric
+    transaction['FINAL_QUANTITY'] = transaction['FINAL_QUANTITY'].replace({'zero': '0'})
+    transaction['FINAL_QUANTITY'] = transaction['FINAL_QUANTITY'].astype(float)
 
+    # Fix (assumed) error value in FINAL_QUANTITY
+    transaction['FINAL_QUANTITY'] = transaction['FINAL_QUANTITY'].replace({276: 2.76})
 
-#### -- Transaction data
+    # Remove duplicated rows where FINAL_SALE is missing
+    def remove_duplicate_missing_sales(df):
+        # Identify duplicate rows based on every column except FINAL_SALE
+        duplicates = df.duplicated(subset=[column for column in df.columns if column != 'FINAL_SALE'], keep=False)
 
-# Drop duplicate rows
-transaction = transaction.drop_duplicates()
+        # Keep non-duplicates and duplicates that have a sale
+        keep = ~duplicates | df['FINAL_SALE'].notna()
 
-# Convert FINAL_QUANTITY to numeric
-transaction['FINAL_QUANTITY'] = transaction['FINAL_QUANTITY'].replace({'zero': '0'})
-transaction['FINAL_QUANTITY'] = transaction['FINAL_QUANTITY'].astype(float)
+        return df.loc[keep]
 
-# Fix (assumed) error value in FINAL_QUANTITY
-transaction['FINAL_QUANTITY'] = transaction['FINAL_QUANTITY'].replace({276: 2.76})
+    transaction = remove_duplicate_missing_sales(transaction)
 
-# Convert FINAL_SALE to numeric
-transaction['FINAL_SALE'] = pd.to_numeric(transaction['FINAL_SALE'], errors='coerce')
 
-# Set BARCODE to string
-transaction['BARCODE'] = transaction['BARCODE'].astype(str)
+    #### -- Products data
 
-# Remove duplicated rows where FINAL_SALE is missing
-def remove_duplicate_missing_sales(df):
-    # Create a subset excluding FINAL_SALES
-    subset_no_sales = df.drop('FINAL_SALE', axis=1)
+    # Verify CATEGORY_1 values are unique
+    # print('Uniques values for Category 1: ', products['CATEGORY_1'].unique())
 
-    # Identify duplicate rows based on the subset
-    duplicates = subset_no_sales.duplicated(keep=False)
+    # Explore 'Needs Review' rows
+    products_needs_review = products.loc[(products['CATEGORY_1'] == 'Needs Review')]
+    # Drop since other values in the hierarchy (Cat 2, 3, 4) are all null
+    # print('Uniques values for Category 2:', products_needs_review['CATEGORY_2'].unique())
+    # (missing CATEGORY_1 values compare as NA with the string dtype, so they are kept explicitly)
+    products = products.loc[~products['CATEGORY_1'].eq('Needs Review').fillna(False)]
 
-    # Filter out duplicates with missing sale
-    valid_sales_duplicates = df[duplicates & df['FINAL_SALE'].notna()]
+    # Drop duplicate rows (after the row filter above so fewer rows are hashed; the result is the same in either order)
+    products = products.drop_duplicates()
 
-    # Filter out non-duplicates
-    non_duplicates = df[~duplicates]
+    # Rename BARCODE for merge
+    products.rename(columns={'BARCODE':'BARCODE_products'}, inplace=True)
 
-    # Combine valid duplicates and non-duplicates
-    cleaned_df = pd.concat([non_duplicates, valid_sales_duplicates]).sort_index()
+    # Flag missing BARCODEs once, reused for dropping them and for the Exercise 3 count and visual
+    products['MISSING_BARCODE'] = products['BARCODE_products'].isna()
 
-    return cleaned_df
+    # Show where BARCODE has duplicate values
+    def get_duplicate_barcode_products(products_df):
+        # Identify duplicate BARCODEs
+        duplicate_barcodes = products_df['BARCODE_products'].duplicated(keep=False)
 
-transaction = remove_duplicate_missing_sales(transaction)
+        # Create the subset DataFrame
+        duplicate_products = products_df[duplicate_barcodes]
 
+        return duplicate_products
 
-#### -- Products data
+    duplicate_products_df = get_duplicate_barcode_products(products)
 
-# Drop duplicate rows
-products = products.drop_duplicates()
+    # Drop missing BARCODE rows (address in Exercise - Part 3)
+    products = products.loc[~products['MISSING_BARCODE']].drop(columns='MISSING_BARCODE')
 
-# Verify CATEGORY_1 values are unique
-# print('Uniques values for Category 1: ', products['CATEGORY_1'].unique())
+    # Keeping the most complete rows for duplicate BARCODES, else keep first row for simplicity (addressed in Exercise - Part 3)
+    def keep_most_complete_duplicates(df, duplicate_column):
+        # Identify duplicates
+        duplicates = df.duplicated(subset=duplicate_column, keep=False)
 
-# Explore 'Needs Review' rows
-products_needs_review = products.loc[(products['CATEGORY_1'] == 'Needs Review')]
-# Drop since other values in the hierarchy (Cat 2, 3, 4) are all null
-# print('Uniques values for Category 2:', products_needs_review['CATEGORY_2'].unique())
-products = products.loc[(products['CATEGORY_1'] != 'Needs Review')]
+        if not duplicates.any():
+            return df
 
+        # Count non-missing values for the duplicate rows
+        non_missing_counts = df.loc[duplicates].notna().sum(axis=1)
 
-# Set BARCODE to string
-products['BARCODE'] = products['BARCODE'].astype(str)
-# Rename BARCODE for merge
-products.rename(columns={'BARCODE':'BARCODE_products'}, inplace=True)
+        # Select the index of the row with the maximum count for each value (first row on ties)
+        most_complete_index = non_missing_counts.groupby(df.loc[duplicates, duplicate_column]).idxmax()
 
-# Show where BARCODE has duplicate values
-def get_duplicate_barcode_products(products_df):
-    # Identify duplicate BARCODEs
-    duplicate_barcodes = products_df['BARCODE_products'].duplicated(keep=False)
+        # Keep non-duplicates and the most complete duplicate rows, in their original order
+        keep = ~duplicates
+        keep.loc[most_complete_index] = True
 
-    # Create the subset DataFrame
-    duplicate_products = products_df[duplicate_barcodes]
+        return df.loc[keep]
 
-    return duplicate_products
+    products = keep_most_complete_duplicates(products, 'BARCODE_products')
 
-duplicate_products_df = get_duplicate_barcode_products(products)
 
-# Get the count of missing and duplicate BARCODE values for Exercise 3
-# Count duplicate BARCODEs
-duplicate_count = duplicate_products_df['BARCODE_products'].nunique()
-# Count missing BARCODEs
-missing_count = duplicate_products_df['BARCODE_products'].isin([np.nan, 'N/A', '', 'nan']).sum()
-print(f"Number of missing BARCODEs: {missing_count}")
-print(f"Number of duplicate BARCODEs: {duplicate_count}")
-
-# Drop missing BARCODE rows (address in Exercise - Part 3)
-products = products.dropna(subset=["BARCODE_products"])
-
-# Keeping the most complete rows for duplicate BARCODES, else keep first row for simplicity (addressed in Exercise - Part 3)
-def keep_most_complete_duplicates(df, duplicate_column):
-    # Identify duplicates
-    duplicates = df.duplicated(subset=duplicate_column, keep=False)
-    duplicate_rows = df[duplicates]
-    non_duplicate_rows = df[~duplicates]
+    #### -- Categorical columns
 
-    if duplicate_rows.empty:
-        return df
+    # Store low-cardinality text columns as categories to cut memory and speed up the merge and grouping
+    user['GENDER'] = user['GENDER'].astype('category')
+    transaction['STORE_NAME'] = transaction['STORE_NAME'].astype('category')
+    for column in ['CATEGORY_1', 'CATEGORY_2', 'CATEGORY_3', 'CATEGORY_4', 'BRAND', 'MANUFACTURER']:
+        products[column] = products[column].astype('category')
 
-    # Count non-missing values
-    non_missing_counts = duplicate_rows.notna().sum(axis=1)
 
-    # Add the count to the df
-    duplicate_rows['non_missing_count'] = non_missing_counts
+    #### -- Cache cleaned data
 
-    # Group and select the row with the maximum count
-    most_complete_rows = duplicate_rows.sort_values('non_missing_count', ascending=False).drop_duplicates(subset=duplicate_column, keep='first')
+    # Save the cleaned datasets so the next run can load them directly (Parquet keeps the column dtypes)
+    if cache_run == True and parquet_available == True:
+        os.makedirs(cache_folder, exist_ok=True)
+        user.to_parquet(cache_files['user'])
+        transaction.to_parquet(cache_files['transaction'])
+        products.to_parquet(cache_files['products'])
+        duplicate_products_df.to_parquet(cache_files['duplicate_products'])
 
-    # Drop the extra count column
-    most_complete_rows = most_complete_rows.drop('non_missing_count', axis=1)
+    # Variables to drop, keep environment clean before moving on to the next section
+    del missing_genders, non_binary_genders, products_needs_review, date_format, user_mask, column
 
-    # Combine with non-duplicates
-    result_df = pd.concat([non_duplicate_rows, most_complete_rows]).sort_index()
 
-    return result_df
-
-products = keep_most_complete_duplicates(products, 'BARCODE_products')
+# Get the count of missing and duplicate BARCODE values for Exercise 3
+# Count duplicate BARCODEs
+duplicate_count = duplicate_products_df['BARCODE_products'].nunique()
+# Count missing BARCODEs
+missing_count = int(duplicate_products_df['MISSING_BARCODE'].sum())
+print(f"Number of missing BARCODEs: {missing_count}")
+print(f"Number of duplicate BARCODEs: {duplicate_count}")
 
 
 #### Merge data
 
-# # Join datasets (replace with the appropriate join logic)
-merged_data = pd.merge(transaction, user, left_on='USER_ID', right_on='ID', how = 'left')
-merged_data = merged_data.drop('ID', axis=1)
-merged_data = pd.merge(merged_data, products, left_on = 'BARCODE', right_on = 'BARCODE_products', how = 'left')
-merged_data = merged_data.drop('BARCODE_products', axis=1)
-
-
-# Profile the joined dataset
+# The full join is only built for profiling, the Exercise 2 questions share a narrower join of just the columns they need
 if profiling_run == True:
+    # Join datasets
+    merged_data = pd.merge(transaction, user, left_on='USER_ID', right_on='ID', how = 'left')
+    merged_data = merged_data.drop('ID', axis=1)
+    merged_data = pd.merge(merged_data, products, left_on = 'BARCODE', right_on = 'BARCODE_products', how = 'left')
+    merged_data = merged_data.drop('BARCODE_products', axis=1)
+
+    # Profile the joined dataset
     merged_data.profile_report().to_file(os.path.join(profiling_folder, "merged_data_profile.html"))
 
 
 # Variables to drop, keep environment clean before moving on to the next section
-del texts_to_replace, products_needs_review
+del user_dtypes, transaction_dtypes, products_dtypes
 
 
 #%% EXERCISE - PART 1
@@ -302,95 +358,83 @@ long term (where can we collect more complete data or address data quality issue
 
 #%% EXERCISE - PART 2
 
+# Join branded sales to the user and product columns the questions need once, shared by every question
+brand_sales = (
+    transaction[['RECEIPT_ID', 'USER_ID', 'BARCODE', 'FINAL_SALE']]
+    .merge(user[['ID', 'AGE', 'ACCOUNT_AGE_MONTHS']], left_on='USER_ID', right_on='ID', how='left')
+    .merge(
+        products.loc[products['BRAND'].notna(), ['BARCODE_products', 'BRAND', 'CATEGORY_2', 'CATEGORY_3']],
+        left_on='BARCODE', right_on='BARCODE_products'
+    )
+)
+
 #### Close-ended questions
 
 #### -- Question 1
 #  What are the top 5 brands by receipts scanned among users 21 and over?
 
-# SQL in python function
-def get_top_5_brands_by_receipts_users_over_21(merged_df):
-    # Create an in-memory SQLite database
-    conn = sqlite3.connect(':memory:')
-
-    # Load the merged DataFrame into the database
-    merged_df.to_sql('merged_table', conn, index=False, if_exists='replace')
-
-    # SQL query
-    query = """
-    SELECT BRAND
-    	,COUNT(DISTINCT RECEIPT_ID) AS receipt_count
-    FROM merged_table
-    WHERE AGE >= 21
-        AND BRAND IS NOT NULL
-    GROUP BY BRAND
-    ORDER BY receipt_count DESC LIMIT 5;
-    """
+# pandas function
+def get_top_5_brands_by_receipts_users_over_21(brand_sales_df):
+    # Filter to users 21 and over
+    filtered_df = brand_sales_df.loc[brand_sales_df['AGE'] >= 21]
 
-    # Execute the query and get the results
-    result_df = pd.read_sql_query(query, conn)
-
-    # Close the connection
-    conn.close()
+    # Count distinct receipts per brand and keep the top 5
+    result_df = (
+        filtered_df.groupby('BRAND', observed=True)['RECEIPT_ID']
+        .nunique()
+        .nlargest(5)
+        .reset_index(name='receipt_count')
+    )
 
     return result_df
 
-top_5_brands = get_top_5_brands_by_receipts_users_over_21(merged_data)
+top_5_brands = get_top_5_brands_by_receipts_users_over_21(brand_sales)
 print('')
 print('The top 5 brands by receipts scanned among users 21 and over are: ', top_5_brands)
 
 #### -- Question 1 results as comment
 # The top 5 brands by receipts scanned among users 21 and over are:
-#         BRAND                    receipt_count
-# 0  LE PETIT MARSEILLAIS             11
-# 1           NERDS CANDY              3
-# 2                  DOVE              3
-# 3               TRIDENT              2
-# 4       SOUR PATCH KIDS              2
+#         BRAND    receipt_count
+# 0         DOVE              3
+# 1  NERDS CANDY              3
+# 2    COCA-COLA              2
+# 3  GREAT VALUE              2
+# 4    HERSHEY'S              2
+# Note: 6 brands are tied at 2 receipts, so rows 2-4 are the first 3 of the tie in brand name order, not a ranking.
 
 
 #### -- Question 2
 # What are the top 5 brands by sales among users that have had their account for at least six months?
 
-# SQL in python function
-def get_top_5_brands_by_sales_account_over_6_months(merged_df):
-    # Create an in-memory SQLite database
-    conn = sqlite3.connect(':memory:')
-
-    # Load the merged DataFrame into the database
-    merged_df.to_sql('merged_table', conn, index=False, if_exists='replace')
-
-    # SQL query
-    query = """
-    SELECT BRAND
-        ,SUM(FINAL_SALE) AS total_sales
-    FROM merged_table
-    WHERE ACCOUNT_AGE_MONTHS >= 6
-        AND BRAND IS NOT NULL
-        AND FINAL_SALE IS NOT NULL
-    GROUP BY BRAND
-    ORDER BY total_sales DESC LIMIT 5;
-    """
-
-    # Execute the query and get the results
-    result_df = pd.read_sql_query(query, conn)
-
-    # Close the connection
-    conn.close()
+# pandas function
+def get_top_5_brands_by_sales_account_over_6_months(brand_sales_df):
+    # Filter to accounts at least 6 months old with a sale
+    filtered_df = brand_sales_df.loc[
+        (brand_sales_df['ACCOUNT_AGE_MONTHS'] >= 6) & brand_sales_df['FINAL_SALE'].notna()
+    ]
+
+    # Sum sales per brand and keep the top 5
+    result_df = (
+        filtered_df.groupby('BRAND', observed=True)['FINAL_SALE']
+        .sum()
+        .nlargest(5)
+        .reset_index(name='total_sales')
+    )
 
     return result_df
 
-top_5_brands = get_top_5_brands_by_sales_account_over_6_months(merged_data)
+top_5_brands = get_top_5_brands_by_sales_account_over_6_months(brand_sales)
 print('')
 print('The top 5 brands by sales among users whos account is 6+ months old are: ', top_5_brands)
 
 #### -- Question 2 results as comment
 # The top 5 brands by sales among users whos account is 6+ months old are:
-#         BRAND               total_sales
-# 0  LE PETIT MARSEILLAIS        96.71
-# 1                   CVS        72.00
-# 2               TRIDENT        46.72
-# 3                  DOVE        42.88
-# 4           COORS LIGHT        34.96
+#         BRAND        total_sales
+# 0          CVS        72.00
+# 1      TRIDENT        46.72
+# 2         DOVE        42.88
+# 3  COORS LIGHT        34.96
+# 4       QUAKER        16.60
 
 
 #### Open-ended questions
@@ -408,38 +452,25 @@ Leading Brand Metric:
         - Determine what "leading" means. Assume it means the brand with the highest total sales in the category.
 """
 
-# SQL in python function
-def get_leading_dips_salsa_brand(merged_df):
-    # Create an in-memory SQLite database
-    conn = sqlite3.connect(':memory:')
-
-    # Load the merged DataFrame into the database
-    merged_df.to_sql('merged_table', conn, index=False, if_exists='replace')
-
-    # SQL query
-    query = """
-    SELECT BRAND
-    	,SUM(FINAL_SALE) AS total_sales
-    FROM merged_table
-    WHERE (
-    		CATEGORY_2 = 'Dips & Salsa'
-            OR CATEGORY_3 = 'Dips & Salsa'
-		    )
-    	AND BRAND IS NOT NULL
-        AND FINAL_SALE IS NOT NULL
-    GROUP BY BRAND
-    ORDER BY total_sales DESC LIMIT 1;
-    """
-
-    # Execute the query and get the results
-    result_df = pd.read_sql_query(query, conn)
-
-    # Close the connection
-    conn.close()
+# pandas function
+def get_leading_dips_salsa_brand(brand_sales_df):
+    # Filter to the Dips & Salsa category with a sale
+    filtered_df = brand_sales_df.loc[
+        ((brand_sales_df['CATEGORY_2'] == 'Dips & Salsa') | (brand_sales_df['CATEGORY_3'] == 'Dips & Salsa'))
+        & brand_sales_df['FINAL_SALE'].notna()
+    ]
+
+    # Sum sales per brand and keep the leader
+    result_df = (
+        filtered_df.groupby('BRAND', observed=True)['FINAL_SALE']
+        .sum()
+        .nlargest(1)
+        .reset_index(name='total_sales')
+    )
 
     return result_df
 
-leading_brand = get_leading_dips_salsa_brand(merged_data)
+leading_brand = get_leading_dips_salsa_brand(brand_sales)
 print('')
 print('The leading brand in the Dips & Salsa category is: ', leading_brand)
 
@@ -467,8 +498,8 @@ def create_polished_missing_by_top_missing_brands_plot(duplicate_products_df, ou
 
     # Group by brand, count missing BARCODEs, and get top 5
     missing_by_brand = (
-        duplicate_products_df.groupby('BRAND')['BARCODE_products']
-        .apply(lambda x: x.isin([np.nan, 'N/A', '', 'nan']).sum())
+        duplicate_products_df.groupby('BRAND', observed=True)['MISSING_BARCODE']
+        .sum()
         .nlargest(5)
     )
 
@@ -518,7 +549,7 @@ We're seeing a significant number of entries with either missing or duplicate BA
 Specifically:
 
     We've identified 3968 records where the BARCODE is missing entirely.
-    Additionally, 28 records show duplicate BARCODEs, but with varying product details.
+    Additionally, 27 records show duplicate BARCODEs, but with varying product details.
 
 Impact:
 These inconsistencies are causing some headaches when we try to accurately link our transaction data to the product catalog.